@@ -11,7 +11,6 @@ import argparse
 import json
 import os
 import sys
-import requests
 from datetime import datetime, timedelta
 from pathlib import Path
 import time
@@ -20,27 +19,138 @@ import base64
 import getpass
 import secrets
 import logging
-import subprocess
-import platform
+import shutil
+import copy
+import re
+import calendar
+import functools
+from typing import Optional
+
+Fernet = None
+AESGCM = None
+CRYPTO_AVAILABLE = None
+
+def _load_crypto():
+    """Import cryptography on first use, return whether it is available"""
+    global Fernet, AESGCM, CRYPTO_AVAILABLE
+    if CRYPTO_AVAILABLE is None:
+        try:
+            from cryptography.fernet import Fernet as _Fernet
+            from cryptography.hazmat.primitives.ciphers.aead import AESGCM as _AESGCM
+            Fernet = _Fernet
+            AESGCM = _AESGCM
+            CRYPTO_AVAILABLE = True
+        except ImportError:
+            CRYPTO_AVAILABLE = False
+            print("⚠️  Warning: cryptography library not installed. API encryption disabled.")
+            print("Install with: pip install cryptography")
+    return CRYPTO_AVAILABLE
 
 try:
-    from cryptography.fernet import Fernet
-    from cryptography.hazmat.primitives import hashes
-    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-    CRYPTO_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    CRYPTO_AVAILABLE = False
-    print("⚠️  Warning: cryptography library not installed. API encryption disabled.")
-    print("Install with: pip install cryptography")
+    ORJSON_AVAILABLE = False
+
+if ORJSON_AVAILABLE:
+    def _json_loads(data):
+        return orjson.loads(data)
+    
+    def _json_dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+else:
+    def _json_loads(data):
+        return json.loads(data)
+    
+    def _json_dumps(obj):
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
 
 __version__ = "0.0.2"
 __author__ = "Kozosvyst Stas (STASX)"
 
-CONFIG_DIR = Path.home() / ".eimg"
-CONFIG_FILE = CONFIG_DIR / "config.json"
-KEY_FILE = CONFIG_DIR / ".key"
+_UA = f'eimg/{__version__} (Earth Image Downloader)'
+_API_HEADERS = {'User-Agent': _UA, 'Accept': 'application/json'}
+_IMG_HEADERS = {'User-Agent': _UA, 'Accept': 'image/png'}
+_IMAGE_HOST = 'https://epic.gsfc.nasa.gov'
+
+CONFIG_DIR_ENV = "EIMG_CONFIG_DIR"
 LOGS_DIR = Path(__file__).parent / "logs"
 CACHE_DIR = Path(__file__).parent / "cache"
+IMAGE_CHUNK_SIZE = 1 << 20
+CACHE_IO_WORKERS = 8
+WIPE_CHUNK_SIZE = 64 * 1024
+PROGRESS_INTERVAL = 0.1
+WARMUP_TIMEOUT = 10
+GCM_BLOB_PREFIX = b'\x02'
+GCM_NONCE_SIZE = 12
+# Stored API keys were derived with this count; changing it breaks decryption
+PBKDF2_ITERATIONS = 100000
+CIPHER_CACHE_SIZE = 16
+
+_DATE_RE = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2})')
+_FILENAME_UNSAFE_RE = re.compile(r'[^\w.-]')
+
+_config_cache = {'stamp': None, 'data': None}
+
+def _config_stamp(path, stat_result):
+    """Identify a config file version by path, mtime and size"""
+    return (str(path), stat_result.st_mtime_ns, stat_result.st_size)
+
+def get_config_dir():
+    """Return the config directory: $EIMG_CONFIG_DIR if set, else ~/.eimg"""
+    env_dir = os.environ.get(CONFIG_DIR_ENV)
+    return Path(env_dir) if env_dir else Path.home() / ".eimg"
+
+def _valid_date(date):
+    """Check that date is a real calendar date in YYYY-MM-DD format"""
+    match = _DATE_RE.fullmatch(date) if isinstance(date, str) else None
+    if not match:
+        return False
+    year, month, day = int(match[1]), int(match[2]), int(match[3])
+    return year >= 1 and 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]
+
+def _scan_log_files():
+    """List *.log entries in LOGS_DIR with one directory scan, None if it is missing"""
+    try:
+        with os.scandir(LOGS_DIR) as it:
+            return [entry for entry in it if entry.name.endswith('.log') and entry.is_file()]
+    except FileNotFoundError:
+        return None
+
+def _write_all(raw_file, data):
+    """Write all of data to an unbuffered file, retrying short writes"""
+    view = memoryview(data)
+    while view:
+        view = view[raw_file.write(view):]
+
+def _preallocate(raw_file, size):
+    """Reserve size bytes for raw_file up front where the OS supports it"""
+    if size <= 0 or not hasattr(os, 'posix_fallocate'):
+        return False
+    try:
+        os.posix_fallocate(raw_file.fileno(), 0, size)
+        return True
+    except OSError:
+        return False
+
+def _link_or_copy(source, destination):
+    """Hard-link source to destination, copying when linking is not possible"""
+    if os.path.abspath(source) == os.path.abspath(destination):
+        return
+    try:
+        os.unlink(destination)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+@functools.lru_cache(maxsize=None)
+def _platform_system():
+    """Return platform.system(), detected once per process"""
+    import platform
+    return platform.system()
 
 class LogManager:
     """Manage application logging"""
@@ -49,24 +159,26 @@ class LogManager:
         self.logger = None
         self.error_logger = None
         self.status_logger = None
+        self._handlers = []
+        self._startup_records = []
         self.setup_logging()
     
     def setup_logging(self):
         """Setup logging configuration"""
         try:
-            LOGS_DIR.mkdir(exist_ok=True)
+            if not LOGS_DIR.is_dir():
+                LOGS_DIR.mkdir(exist_ok=True)
         
             log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
             
             for handler in logging.root.handlers[:]:
                 logging.root.removeHandler(handler)
             
+            main_handler = logging.FileHandler(LOGS_DIR / "eimg.log", encoding='utf-8', delay=True)
             logging.basicConfig(
                 level=logging.INFO,
                 format=log_format,
-                handlers=[
-                    logging.FileHandler(LOGS_DIR / "eimg.log", encoding='utf-8'),
-                ],
+                handlers=[main_handler],
                 force=True
             )
             
@@ -77,27 +189,59 @@ class LogManager:
             self.error_logger.propagate = False
             self.status_logger.propagate = False
             
-            error_handler = logging.FileHandler(LOGS_DIR / "errors.log", encoding='utf-8')
+            for named_logger in (self.error_logger, self.status_logger):
+                for handler in named_logger.handlers[:]:
+                    named_logger.removeHandler(handler)
+                    handler.close()
+            
+            error_handler = logging.FileHandler(LOGS_DIR / "errors.log", encoding='utf-8', delay=True)
             error_handler.setLevel(logging.ERROR)
             error_handler.setFormatter(logging.Formatter(log_format))
             self.error_logger.addHandler(error_handler)
             
-            status_handler = logging.FileHandler(LOGS_DIR / "status.log", encoding='utf-8')
+            status_handler = logging.FileHandler(LOGS_DIR / "status.log", encoding='utf-8', delay=True)
             status_handler.setLevel(logging.INFO)
             status_handler.setFormatter(logging.Formatter(log_format))
             self.status_logger.addHandler(status_handler)
             
-            self.logger.info("Logging system initialized")
+            self._handlers = [
+                (logging.root, main_handler),
+                (self.error_logger, error_handler),
+                (self.status_logger, status_handler),
+            ]
+            
+            self.log_startup("Logging system initialized")
             
         except Exception as e:
             print(f"❌ Failed to setup logging: {e}")
     
-    def log_error(self, message, exception=None):
-        """Log error message"""
+    def close(self):
+        """Detach and close the log handlers installed by this manager"""
+        for logger, handler in self._handlers:
+            logger.removeHandler(handler)
+            handler.close()
+        self._handlers = []
+    
+    def log_startup(self, message):
+        """Hold a startup info message until something else is logged"""
+        # Keeps eimg.log from being created by commands that log nothing else
+        if self.logger:
+            self._startup_records.append(
+                self.logger.makeRecord(self.logger.name, logging.INFO, __file__, 0, message, None, None))
+    
+    def _flush_startup(self):
+        """Write held startup messages ahead of the first real log entry"""
+        records, self._startup_records = self._startup_records, []
+        for record in records:
+            self.logger.handle(record)
+    
+    def log_error(self, message, exception=None, *, tb=False):
+        """Log error message, with traceback only when tb is set"""
         try:
+            self._flush_startup()
             if self.error_logger:
                 if exception:
-                    self.error_logger.error(f"{message}: {exception}", exc_info=True)
+                    self.error_logger.error(f"{message}: {exception}", exc_info=exception if tb else False)
                 else:
                     self.error_logger.error(message)
         except Exception:
@@ -106,6 +250,7 @@ class LogManager:
     def log_status(self, message):
         """Log status message"""
         try:
+            self._flush_startup()
             if self.status_logger:
                 self.status_logger.info(message)
         except Exception:
@@ -114,31 +259,76 @@ class LogManager:
     def log_info(self, message):
         """Log info message"""
         try:
+            self._flush_startup()
             if self.logger:
                 self.logger.info(message)
         except Exception:
             pass
 
+def _discard_log(*args, **kwargs):
+    """Stand-in for LogManager methods when logging is unavailable"""
+
 class CacheManager:
     """Manage image cache"""
     
     def __init__(self, log_manager):
         self.log_manager = log_manager
+        self._log_info = log_manager.log_info if log_manager else _discard_log
+        self._log_status = log_manager.log_status if log_manager else _discard_log
+        self._log_error = log_manager.log_error if log_manager else _discard_log
+        self._log_startup = log_manager.log_startup if log_manager else _discard_log
+        self._img_dir = os.path.join(CACHE_DIR, "images")
+        self._meta_dir = os.path.join(CACHE_DIR, "metadata")
+        self._thumb_dir = os.path.join(CACHE_DIR, "thumbnails")
+        self._api_dir = os.path.join(CACHE_DIR, "api")
+        self._layout = (
+            ("images", self._img_dir, ".png"),
+            ("metadata", self._meta_dir, ".json"),
+            ("thumbnails", self._thumb_dir, ".jpg"),
+            ("api", self._api_dir, ".json"),
+        )
         self.setup_cache()
     
     def setup_cache(self):
         """Setup cache directory structure"""
         try:
-            CACHE_DIR.mkdir(exist_ok=True)
-            (CACHE_DIR / "images").mkdir(exist_ok=True)
-            (CACHE_DIR / "metadata").mkdir(exist_ok=True)
-            (CACHE_DIR / "thumbnails").mkdir(exist_ok=True)
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            for _, directory, _ in self._layout:
+                os.makedirs(directory, exist_ok=True)
             
-            if self.log_manager:
-                self.log_manager.log_info("Cache directory structure created")
+            self._log_startup("Cache directory structure created")
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error("Failed to setup cache", e)
+            self._log_error("Failed to setup cache", e, tb=True)
+    
+    def _iter_entries(self, directory, suffix, include_links=False):
+        """Yield cached files in directory matching suffix, plus symlinks when include_links is set"""
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(suffix):
+                        continue
+                    # Symlinks are not followed, matching the lstat() sizes in get_cache_stats
+                    if entry.is_file(follow_symlinks=False) or (include_links and entry.is_symlink()):
+                        yield entry
+        except FileNotFoundError:
+            return
+    
+    def _remove_entries(self, entries):
+        """Remove cached files concurrently, return number removed"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        def remove(entry):
+            try:
+                os.unlink(entry.path)
+                return True
+            except OSError:
+                return False
+        
+        entries = list(entries)
+        if not entries:
+            return 0
+        with ThreadPoolExecutor(max_workers=CACHE_IO_WORKERS) as executor:
+            return sum(executor.map(remove, entries))
     
     def get_cache_stats(self):
         """Get cache statistics"""
@@ -150,116 +340,165 @@ class CacheManager:
                 'thumbnails': 0
             }
             
-            images_dir = CACHE_DIR / "images"
-            if images_dir.exists():
-                for file in images_dir.glob("*.png"):
-                    try:
-                        stats['images'] += 1
-                        stats['total_size'] += file.stat().st_size
-                    except (OSError, FileNotFoundError):
-                        continue
-            
-            metadata_dir = CACHE_DIR / "metadata"
-            if metadata_dir.exists():
-                stats['metadata_files'] = len(list(metadata_dir.glob("*.json")))
+            for entry in self._iter_entries(self._img_dir, ".png"):
+                try:
+                    size = entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+                stats['total_size'] += size
+                stats['images'] += 1
             
-            thumbnails_dir = CACHE_DIR / "thumbnails"
-            if thumbnails_dir.exists():
-                stats['thumbnails'] = len(list(thumbnails_dir.glob("*.jpg")))
+            stats['metadata_files'] = sum(1 for _ in self._iter_entries(self._meta_dir, ".json"))
+            stats['thumbnails'] = sum(1 for _ in self._iter_entries(self._thumb_dir, ".jpg"))
             
             return stats
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error("Failed to get cache stats", e)
+            self._log_error("Failed to get cache stats", e, tb=True)
             return {}
     
     def clear_cache(self, cache_type="all"):
         """Clear cache"""
         try:
-            cleared = 0
+            targets = [(directory, suffix) for name, directory, suffix in self._layout
+                       if cache_type in ("all", name)]
             
-            if cache_type in ["all", "images"]:
-                images_dir = CACHE_DIR / "images"
-                if images_dir.exists():
-                    for file in images_dir.glob("*.png"):
-                        try:
-                            file.unlink()
-                            cleared += 1
-                        except (OSError, FileNotFoundError):
-                            continue
-            
-            if cache_type in ["all", "metadata"]:
-                metadata_dir = CACHE_DIR / "metadata"
-                if metadata_dir.exists():
-                    for file in metadata_dir.glob("*.json"):
-                        try:
-                            file.unlink()
-                            cleared += 1
-                        except (OSError, FileNotFoundError):
-                            continue
-            
-            if cache_type in ["all", "thumbnails"]:
-                thumbnails_dir = CACHE_DIR / "thumbnails"
-                if thumbnails_dir.exists():
-                    for file in thumbnails_dir.glob("*.jpg"):
-                        try:
-                            file.unlink()
-                            cleared += 1
-                        except (OSError, FileNotFoundError):
-                            continue
+            entries = []
+            for directory, suffix in targets:
+                # Symlinked entries are removed too (the link, not its target)
+                entries.extend(self._iter_entries(directory, suffix, include_links=True))
+            cleared = self._remove_entries(entries)
             
-            if self.log_manager:
-                self.log_manager.log_status(f"Cache cleared: {cleared} files removed")
+            self._log_status(f"Cache cleared: {cleared} files removed")
             return cleared
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error("Failed to clear cache", e)
+            self._log_error("Failed to clear cache", e, tb=True)
             return 0
     
-    def save_image_to_cache(self, image_data, filename, metadata=None):
-        """Save image to cache"""
+    def image_path(self, filename):
+        """Path of cached image with filename"""
+        return Path(os.path.join(self._img_dir, filename))
+    
+    def save_image_to_cache(self, image_source, filename, metadata=None):
+        """Save image to cache from bytes, a file path or a file-like object"""
         try:
-            if not image_data or not filename:
+            if not image_source or not filename:
                 return None
                 
-            cache_path = CACHE_DIR / "images" / filename
-            with open(cache_path, 'wb') as f:
-                f.write(image_data)
+            cache_path = os.path.join(self._img_dir, filename)
+            if isinstance(image_source, (str, Path)):
+                if os.path.abspath(image_source) != os.path.abspath(cache_path):
+                    shutil.copyfile(image_source, cache_path)
+            elif hasattr(image_source, 'read'):
+                with open(cache_path, 'wb') as f:
+                    shutil.copyfileobj(image_source, f, IMAGE_CHUNK_SIZE)
+            else:
+                with open(cache_path, 'wb') as f:
+                    f.write(image_source)
             
             if metadata:
-                metadata_path = CACHE_DIR / "metadata" / f"{filename}.json"
-                with open(metadata_path, 'w', encoding='utf-8') as f:
-                    json.dump(metadata, f, indent=2, ensure_ascii=False)
+                self.save_metadata(filename, metadata)
             
-            if self.log_manager:
-                self.log_manager.log_info(f"Image cached: {filename}")
-            return cache_path
+            self._log_info(f"Image cached: {filename}")
+            return Path(cache_path)
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error("Failed to save image to cache", e)
+            self._log_error("Failed to save image to cache", e, tb=True)
             return None
+    
+    def save_metadata(self, filename, metadata):
+        """Save image metadata to cache"""
+        try:
+            metadata_path = os.path.join(self._meta_dir, f"{filename}.json")
+            with open(metadata_path, 'wb') as f:
+                f.write(_json_dumps(metadata))
+            return Path(metadata_path)
+        except Exception as e:
+            self._log_error("Failed to save metadata to cache", e, tb=True)
+            return None
+
+    def _api_cache_path(self, endpoint):
+        """Path of the cached API response for endpoint"""
+        endpoint_hash = hashlib.sha256(endpoint.encode()).hexdigest()[:16]
+        return os.path.join(self._api_dir, f"{endpoint_hash}.json")
+    
+    def get_cached_response(self, endpoint):
+        """Get cached API response with its validators, or None"""
+        try:
+            with open(self._api_cache_path(endpoint), 'rb') as f:
+                entry = _json_loads(f.read())
+            if entry.get('endpoint') != endpoint or 'data' not in entry:
+                return None
+            return entry
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self._log_error("Failed to read cached API response", e)
+            return None
+    
+    def store_cached_response(self, endpoint, etag, data, last_modified=None):
+        """Cache API response together with its ETag/Last-Modified validators"""
+        try:
+            entry = {
+                'endpoint': endpoint,
+                'etag': etag,
+                'last_modified': last_modified,
+                'data': data
+            }
+            with open(self._api_cache_path(endpoint), 'wb') as f:
+                f.write(_json_dumps(entry))
+            return True
+        except Exception as e:
+            self._log_error("Failed to cache API response", e, tb=True)
+            return False
 
 class SecurityManager:
     """Handle encryption and security operations"""
     
-    def __init__(self):
+    def __init__(self, iterations: int = PBKDF2_ITERATIONS):
         self.salt = b'eimg_salt_2025_stasx'
-        self.crypto_available = CRYPTO_AVAILABLE
+        self.iterations = iterations
+        self._key_cache = {}
+        self._cipher_cache = {}
+    
+    @property
+    def crypto_available(self):
+        """Whether the cryptography library can be used"""
+        return _load_crypto()
+    
+    def _key_cache_id(self, password: str) -> bytes:
+        """Build key cache identifier without retaining the password"""
+        return hashlib.sha256(password.encode() + self.salt).digest()
+    
+    def clear_key_cache(self):
+        """Forget all derived encryption keys"""
+        self._key_cache.clear()
+        self._cipher_cache.clear()
+    
+    def _cipher(self, key: bytes):
+        """Reuse the AESGCM instance for a derived key (LRU bounded)"""
+        cipher = self._cipher_cache.pop(key, None)
+        if cipher is None:
+            cipher = AESGCM(base64.urlsafe_b64decode(key))
+            if len(self._cipher_cache) >= CIPHER_CACHE_SIZE:
+                del self._cipher_cache[next(iter(self._cipher_cache))]
+        self._cipher_cache[key] = cipher
+        return cipher
     
     def _generate_key(self, password: str) -> bytes:
-        """Generate encryption key from password"""
+        """Generate encryption key from password (memoized per password)"""
         if not self.crypto_available:
             print("❌ Cryptography not available")
             return None
             
         try:
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=self.salt,
-                iterations=100000,
-            )
-            key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
+            cache_id = self._key_cache_id(password)
+            cached_key = self._key_cache.get(cache_id)
+            if cached_key:
+                return cached_key
+            
+            # hashlib delegates to OpenSSL, which uses SHA extensions where available
+            derived = hashlib.pbkdf2_hmac('sha256', password.encode(), self.salt, self.iterations, dklen=32)
+            key = base64.urlsafe_b64encode(derived)
+            self._key_cache[cache_id] = key
             return key
         except Exception as e:
             print(f"❌ Error generating encryption key: {e}")
@@ -279,13 +518,38 @@ class SecurityManager:
             if not key:
                 return None
             
-            f = Fernet(key)
-            encrypted_data = f.encrypt(data.encode())
-            return base64.urlsafe_b64encode(encrypted_data).decode()
+            return self._seal(self._cipher(key), data)
+        except Exception as e:
+            print(f"❌ Encryption error: {e}")
+            return None
+    
+    def encrypt_many(self, items, password: str) -> Optional[list]:
+        """Encrypt several values with one derived key, empty items map to None (None on failure)"""
+        if not self.crypto_available:
+            print("❌ Encryption not available - cryptography library not installed")
+            return None
+            
+        try:
+            if not password:
+                return None
+                
+            key = self._generate_key(password)
+            if not key:
+                return None
+            
+            cipher = self._cipher(key)
+            return [self._seal(cipher, data) if data else None for data in items]
         except Exception as e:
             print(f"❌ Encryption error: {e}")
             return None
     
+    @staticmethod
+    def _seal(cipher, data: str) -> str:
+        """Encrypt data with a fresh nonce into the stored blob format"""
+        nonce = secrets.token_bytes(GCM_NONCE_SIZE)
+        ciphertext = cipher.encrypt(nonce, data.encode(), None)
+        return base64.urlsafe_b64encode(GCM_BLOB_PREFIX + nonce + ciphertext).decode()
+    
     def decrypt_data(self, encrypted_data: str, password: str) -> str:
         """Decrypt sensitive data"""
         if not self.crypto_available:
@@ -300,9 +564,14 @@ class SecurityManager:
             if not key:
                 return None
             
-            f = Fernet(key)
             encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode())
-            decrypted_data = f.decrypt(encrypted_bytes)
+            if encrypted_bytes.startswith(GCM_BLOB_PREFIX):
+                nonce_end = len(GCM_BLOB_PREFIX) + GCM_NONCE_SIZE
+                nonce = encrypted_bytes[len(GCM_BLOB_PREFIX):nonce_end]
+                decrypted_data = self._cipher(key).decrypt(nonce, encrypted_bytes[nonce_end:], None)
+            else:
+                # Keys stored before encryption version 2.0 are Fernet tokens
+                decrypted_data = Fernet(key).decrypt(encrypted_bytes)
             return decrypted_data.decode()
         except Exception as e:
             print(f"❌ Decryption error: {e}")
@@ -333,22 +602,84 @@ class SecurityManager:
             return False
 
 class EarthImageDownloader:
-    def __init__(self):
+    def __init__(self, config_dir=None):
+        self.config_dir = Path(config_dir) if config_dir is not None else get_config_dir()
+        self.config_file = self.config_dir / "config.json"
+        
         try:
             self.log_manager = LogManager()
+            self._log_info = self.log_manager.log_info
+            self._log_status = self.log_manager.log_status
+            self._log_error = self.log_manager.log_error
             self.cache_manager = CacheManager(self.log_manager)
             self.security = SecurityManager()
             self.config = self.load_config()
+            self._config_snapshot = copy.deepcopy(self.config)
             self._master_password = None
+            self._http = None
+            self._warmup_thread = None
             
-            if self.log_manager:
-                self.log_manager.log_info("EarthImageDownloader initialized")
+            self.log_manager.log_startup("EarthImageDownloader initialized")
         except Exception as e:
             print(f"⚠️  Warning: Could not initialize: {e}")
             self.config = {}
+            self._config_snapshot = {}
             self.log_manager = None
+            self._log_info = self._log_status = self._log_error = _discard_log
             self.cache_manager = None
             self.security = SecurityManager()
+            self._master_password = None
+            self._http = None
+            self._warmup_thread = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
+    def close(self):
+        """Release pooled HTTP connections and log files"""
+        if self._warmup_thread is not None:
+            # Let the warm-up request finish before its session is closed
+            self._warmup_thread.join(WARMUP_TIMEOUT)
+            self._warmup_thread = None
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+        if self.log_manager:
+            self.log_manager.close()
+    
+    @property
+    def http(self):
+        """Shared HTTP session, created on first use"""
+        if self._http is None:
+            self._http = self._create_http_session()
+        return self._http
+    
+    def _create_http_session(self):
+        """Create HTTP session with keep-alive connection pooling"""
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        session = requests.Session()
+        session.headers.update(_API_HEADERS)
+        
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=['GET', 'HEAD'],
+                raise_on_status=False
+            )
+        )
+        session.mount('https://', adapter)
+        return session
     
     def _get_master_password(self, confirm=False):
         """Get master password for encryption"""
@@ -382,47 +713,70 @@ class EarthImageDownloader:
             return None
         
     def load_config(self):
-        """Load configuration from file"""
+        """Load configuration from file, reusing the parsed copy while unchanged"""
         try:
-            if CONFIG_FILE.exists():
-                with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if content:
-                        return json.loads(content)
-            return {}
+            try:
+                stamp = _config_stamp(self.config_file, self.config_file.stat())
+            except FileNotFoundError:
+                return {}
+            
+            if stamp == _config_cache['stamp']:
+                return copy.deepcopy(_config_cache['data'])
+            
+            with open(self.config_file, 'rb') as f:
+                content = f.read().strip()
+            config = _json_loads(content) if content else {}
+            
+            _config_cache['stamp'] = stamp
+            _config_cache['data'] = copy.deepcopy(config)
+            return config
         except json.JSONDecodeError as e:
             print(f"⚠️  Warning: Invalid config file format: {e}")
             return {}
         except PermissionError:
-            print(f"❌ Error: No permission to read config file: {CONFIG_FILE}")
+            print(f"❌ Error: No permission to read config file: {self.config_file}")
             return {}
         except Exception as e:
             print(f"❌ Error loading config: {e}")
             return {}
     
-    def save_config(self):
-        """Save configuration to file with proper permissions"""
+    def save_config(self, durable=False):
+        """Save configuration atomically with proper permissions, fsyncing first when durable"""
         try:
-            CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+            if self.config == self._config_snapshot and self.config_file.exists():
+                return True
+            
+            self.config_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
             
             if os.name != 'nt':
+                # mkdir leaves an existing directory's mode untouched
                 try:
-                    os.chmod(CONFIG_DIR, 0o700)
+                    os.chmod(self.config_dir, 0o700)
                 except OSError:
                     pass
             
-            with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
-            
-            if os.name != 'nt':
+            tmp_file = self.config_file.with_suffix('.json.tmp')
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o600)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(_json_dumps(self.config))
+                    if durable:
+                        f.flush()
+                        os.fsync(f.fileno())
+                os.replace(tmp_file, self.config_file)
+            except BaseException:
                 try:
-                    os.chmod(CONFIG_FILE, 0o600)
+                    tmp_file.unlink()
                 except OSError:
                     pass
+                raise
             
+            self._config_snapshot = copy.deepcopy(self.config)
+            _config_cache['stamp'] = _config_stamp(self.config_file, self.config_file.stat())
+            _config_cache['data'] = copy.deepcopy(self.config)
             return True
         except PermissionError:
-            print(f"❌ Error: No permission to write config file: {CONFIG_FILE}")
+            print(f"❌ Error: No permission to write config file: {self.config_file}")
             return False
         except OSError as e:
             print(f"❌ Error: Could not create config directory: {e}")
@@ -438,11 +792,11 @@ class EarthImageDownloader:
                 print("❌ Error: Invalid API key format. Please check your NASA API key.")
                 return False
             
-            if not CRYPTO_AVAILABLE:
+            if not _load_crypto():
                 print("⚠️  Warning: Storing API key without encryption (cryptography not available)")
                 self.config['api_key'] = api_key.strip()
-                if self.save_config():
-                    print(f"✅ API key saved to {CONFIG_FILE}")
+                if self.save_config(durable=True):
+                    print(f"✅ API key saved to {self.config_file}")
                     return True
                 return False
             
@@ -457,20 +811,19 @@ class EarthImageDownloader:
             
             self.config['encrypted_api_key'] = encrypted_key
             self.config['key_hash'] = self.security.hash_string(api_key.strip())
-            self.config['encryption_version'] = '1.0'
+            self.config['encryption_version'] = '2.0'
             
             if 'api_key' in self.config:
                 del self.config['api_key']
             
-            if self.save_config():
-                print(f"✅ Encrypted API key saved to {CONFIG_FILE}")
+            if self.save_config(durable=True):
+                print(f"✅ Encrypted API key saved to {self.config_file}")
                 print("🔐 Your API key is now encrypted and secure!")
                 return True
             return False
             
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error("Error setting API key", e)
+            self._log_error("Error setting API key", e, tb=True)
             print(f"❌ Error setting API key: {e}")
             return False
     
@@ -478,7 +831,7 @@ class EarthImageDownloader:
         """Get decrypted NASA API key"""
         try:
             if 'api_key' in self.config and 'encrypted_api_key' not in self.config:
-                if not CRYPTO_AVAILABLE:
+                if not _load_crypto():
                     return self.config.get('api_key', '')
                 print("⚠️  Warning: Unencrypted API key detected. Please re-set your API key for security.")
                 return self.config.get('api_key', '')
@@ -487,7 +840,7 @@ class EarthImageDownloader:
             if not encrypted_key:
                 return ''
             
-            if not CRYPTO_AVAILABLE:
+            if not _load_crypto():
                 print("❌ Cannot decrypt API key - cryptography library not available")
                 return ''
             
@@ -510,13 +863,14 @@ class EarthImageDownloader:
             return decrypted_key
             
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error("Error getting API key", e)
+            self._log_error("Error getting API key", e, tb=True)
             print(f"❌ Error getting API key: {e}")
             return ''
     
     def validate_api_key(self):
         """Validate API key by making a test request"""
+        import requests
+        
         try:
             api_key = self.get_api_key()
             if not api_key:
@@ -526,12 +880,7 @@ class EarthImageDownloader:
             print("🔑 Validating API key...")
             url = f"https://api.nasa.gov/EPIC/api/natural/images?api_key={api_key}"
 
-            headers = {
-                'User-Agent': f'eimg/{__version__} (Earth Image Downloader)',
-                'Accept': 'application/json'
-            }
-            
-            response = requests.get(url, timeout=15, headers=headers)
+            response = self.http.get(url, timeout=15)
             
             if response.status_code == 200:
                 print("✅ API key is valid and working!")
@@ -544,13 +893,11 @@ class EarthImageDownloader:
                 return False
                 
         except requests.RequestException as e:
-            if self.log_manager:
-                self.log_manager.log_error("Network error during validation", e)
+            self._log_error("Network error during validation", e)
             print(f"❌ Network error during validation: {e}")
             return False
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error("Error validating API key", e)
+            self._log_error("Error validating API key", e, tb=True)
             print(f"❌ Error validating API key: {e}")
             return False
     
@@ -564,34 +911,88 @@ class EarthImageDownloader:
                 print("❌ Operation cancelled")
                 return False
             
-            if CONFIG_FILE.exists():
+            if self.config_file.exists():
                 try:
-                    file_size = CONFIG_FILE.stat().st_size
+                    file_size = self.config_file.stat().st_size
                     if file_size > 0:
-                        with open(CONFIG_FILE, 'wb') as f:
-                            f.write(secrets.token_bytes(max(file_size, 1024)))
+                        # One random pass in place is enough on modern filesystems;
+                        # SSDs need TRIM or crypto-erase for true erasure regardless
+                        remaining = file_size
+                        with open(self.config_file, 'r+b') as f:
+                            while remaining > 0:
+                                chunk_size = min(remaining, WIPE_CHUNK_SIZE)
+                                f.write(secrets.token_bytes(chunk_size))
+                                remaining -= chunk_size
                             f.flush()
                             os.fsync(f.fileno())
                     
-                    CONFIG_FILE.unlink()
+                    self.config_file.unlink()
                 except Exception as e:
                     print(f"⚠️  Warning: Could not securely wipe file: {e}")
-                    CONFIG_FILE.unlink()
+                    self.config_file.unlink()
             
             self.config = {}
+            self._config_snapshot = {}
             self._master_password = None
+            self.security.clear_key_cache()
             
             print("✅ Configuration securely wiped")
             return True
             
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error("Error wiping config", e)
+            self._log_error("Error wiping config", e, tb=True)
             print(f"❌ Error wiping config: {e}")
             return False
     
+    def _warm_image_host(self):
+        """Open a pooled connection to the image host while API metadata is fetched (once per session)"""
+        import threading
+        
+        if self._warmup_thread is not None:
+            return self._warmup_thread
+        
+        session = self.http
+        
+        def warm():
+            try:
+                session.head(f"{_IMAGE_HOST}/", timeout=WARMUP_TIMEOUT, allow_redirects=False)
+            except Exception:
+                pass
+        
+        self._warmup_thread = threading.Thread(target=warm, name="eimg-warmup", daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
+    
+    def _get_api_json(self, endpoint, api_key):
+        """Fetch EPIC API JSON, revalidating cached responses with ETag/Last-Modified"""
+        url = f"https://api.nasa.gov/EPIC/api/natural/{endpoint}?api_key={api_key}"
+        cached = self.cache_manager.get_cached_response(endpoint) if self.cache_manager else None
+        
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        
+        response = self.http.get(url, timeout=15, headers=headers)
+        if response.status_code == 304 and cached:
+            self._log_info(f"API response not modified: {endpoint}")
+            return cached['data']
+        
+        response.raise_for_status()
+        data = _json_loads(response.content)
+        
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if self.cache_manager and (etag or last_modified):
+            self.cache_manager.store_cached_response(endpoint, etag, data, last_modified)
+        return data
+    
     def get_available_dates(self, limit=10):
         """Get list of available image dates"""
+        import requests
+        
         api_key = self.get_api_key()
         if not api_key:
             print("❌ Error: No API key set. Use 'python main.py set API=your_key_here'")
@@ -599,16 +1000,7 @@ class EarthImageDownloader:
         
         try:
             print("📅 Fetching available dates...")
-            url = f"https://api.nasa.gov/EPIC/api/natural/available?api_key={api_key}"
-            
-            headers = {
-                'User-Agent': f'eimg/{__version__} (Earth Image Downloader)',
-                'Accept': 'application/json'
-            }
-            
-            response = requests.get(url, timeout=15, headers=headers)
-            response.raise_for_status()
-            dates = response.json()
+            dates = self._get_api_json("available", api_key)
             
             if not dates:
                 print("❌ No dates available")
@@ -624,53 +1016,43 @@ class EarthImageDownloader:
             return dates
             
         except requests.HTTPError as e:
-            if self.log_manager:
-                self.log_manager.log_error("HTTP error getting dates", e)
+            self._log_error("HTTP error getting dates", e)
             print(f"❌ HTTP error: {e}")
             return []
         except requests.RequestException as e:
-            if self.log_manager:
-                self.log_manager.log_error("Network error getting dates", e)
+            self._log_error("Network error getting dates", e)
             print(f"❌ Network error: {e}")
             return []
         except json.JSONDecodeError:
             print("❌ Error: Invalid response format from API")
             return []
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error("Unexpected error getting dates", e)
+            self._log_error("Unexpected error getting dates", e, tb=True)
             print(f"❌ Unexpected error: {e}")
             return []
     
     def show_metadata(self, date=None):
         """Show metadata for images"""
+        import requests
+        
         api_key = self.get_api_key()
         if not api_key:
             print("❌ Error: No API key set. Use 'python main.py set API=your_key_here'")
             return False
         
         try:
-            headers = {
-                'User-Agent': f'eimg/{__version__} (Earth Image Downloader)',
-                'Accept': 'application/json'
-            }
-            
             if date:
-                try:
-                    datetime.strptime(date, '%Y-%m-%d')
-                except ValueError:
+                if not _valid_date(date):
                     print("❌ Error: Invalid date format. Use YYYY-MM-DD")
                     return False
                     
-                url = f"https://api.nasa.gov/EPIC/api/natural/date/{date}?api_key={api_key}"
+                endpoint = f"date/{date}"
                 print(f"📋 Metadata for {date}:")
             else:
-                url = f"https://api.nasa.gov/EPIC/api/natural/images?api_key={api_key}"
+                endpoint = "images"
                 print("📋 Latest image metadata:")
             
-            response = requests.get(url, timeout=15, headers=headers)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_api_json(endpoint, api_key)
             
             if not data:
                 print("❌ No metadata available")
@@ -691,41 +1073,31 @@ class EarthImageDownloader:
             return True
             
         except requests.RequestException as e:
-            if self.log_manager:
-                self.log_manager.log_error("Network error fetching metadata", e)
+            self._log_error("Network error fetching metadata", e)
             print(f"❌ Network error: {e}")
             return False
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error("Error fetching metadata", e)
+            self._log_error("Error fetching metadata", e, tb=True)
             print(f"❌ Error fetching metadata: {e}")
             return False
     
-    def download_by_date(self, date, output_dir='.', filename=None):
+    def download_by_date(self, date, output_dir='.', filename=None, save_to_cache=True):
         """Download Earth image for specific date (YYYY-MM-DD format)"""
+        import requests
+        
         api_key = self.get_api_key()
         if not api_key:
             print("❌ Error: No API key set. Use 'python main.py set API=your_key_here'")
             return False
         
         try:
-            try:
-                datetime.strptime(date, '%Y-%m-%d')
-            except ValueError:
+            if not _valid_date(date):
                 print("❌ Error: Invalid date format. Use YYYY-MM-DD")
                 return False
             
             print(f"🌍 Fetching Earth image for {date}...")
-            url = f"https://api.nasa.gov/EPIC/api/natural/date/{date}?api_key={api_key}"
-            
-            headers = {
-                'User-Agent': f'eimg/{__version__} (Earth Image Downloader)',
-                'Accept': 'application/json'
-            }
-            
-            response = requests.get(url, timeout=15, headers=headers)
-            response.raise_for_status()
-            data = response.json()
+            self._warm_image_host()
+            data = self._get_api_json(f"date/{date}", api_key)
             
             if not data:
                 print(f"❌ No images available for {date}")
@@ -734,31 +1106,31 @@ class EarthImageDownloader:
             image_data = data[0]
             image_name = image_data['image']
             date_formatted = date.replace('-', '/')
-            image_url = f"https://epic.gsfc.nasa.gov/archive/natural/{date_formatted}/png/{image_name}.png"
+            image_url = f"{_IMAGE_HOST}/archive/natural/{date_formatted}/png/{image_name}.png"
             
-            return self._download_image(image_url, image_name, image_data['date'], output_dir, filename)
+            return self._download_image(image_url, image_name, image_data['date'], output_dir, filename,
+                                        save_to_cache)
             
         except requests.HTTPError as e:
             if "404" in str(e):
                 print(f"❌ No images found for date {date}")
             else:
-                if self.log_manager:
-                    self.log_manager.log_error("HTTP error downloading by date", e)
+                self._log_error("HTTP error downloading by date", e)
                 print(f"❌ HTTP error: {e}")
             return False
         except requests.RequestException as e:
-            if self.log_manager:
-                self.log_manager.log_error("Network error downloading by date", e)
+            self._log_error("Network error downloading by date", e)
             print(f"❌ Network error: {e}")
             return False
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error("Unexpected error downloading by date", e)
+            self._log_error("Unexpected error downloading by date", e, tb=True)
             print(f"❌ Unexpected error: {e}")
             return False
     
-    def download_latest(self, output_dir='.', filename=None):
+    def download_latest(self, output_dir='.', filename=None, save_to_cache=True):
         """Download latest Earth image"""
+        import requests
+        
         api_key = self.get_api_key()
         if not api_key:
             print("❌ Error: No API key set. Use 'python main.py set API=your_key_here'")
@@ -766,16 +1138,8 @@ class EarthImageDownloader:
         
         try:
             print("🌍 Fetching latest Earth image metadata...")
-            url = f"https://api.nasa.gov/EPIC/api/natural/images?api_key={api_key}"
-            
-            headers = {
-                'User-Agent': f'eimg/{__version__} (Earth Image Downloader)',
-                'Accept': 'application/json'
-            }
-            
-            response = requests.get(url, timeout=15, headers=headers)
-            response.raise_for_status()
-            data = response.json()
+            self._warm_image_host()
+            data = self._get_api_json("images", api_key)
             
             if not data:
                 print("❌ No images available")
@@ -784,95 +1148,148 @@ class EarthImageDownloader:
             image_data = data[0]
             image_name = image_data['image']
             date = image_data['date'].split()[0].replace('-', '/')
-            image_url = f"https://epic.gsfc.nasa.gov/archive/natural/{date}/png/{image_name}.png"
+            image_url = f"{_IMAGE_HOST}/archive/natural/{date}/png/{image_name}.png"
             
-            return self._download_image(image_url, image_name, image_data['date'], output_dir, filename)
+            return self._download_image(image_url, image_name, image_data['date'], output_dir, filename,
+                                        save_to_cache)
             
         except requests.HTTPError as e:
-            if self.log_manager:
-                self.log_manager.log_error("HTTP error downloading latest", e)
+            self._log_error("HTTP error downloading latest", e)
             print(f"❌ HTTP error: {e}")
             return False
         except requests.RequestException as e:
-            if self.log_manager:
-                self.log_manager.log_error("Network error downloading latest", e)
+            self._log_error("Network error downloading latest", e)
             print(f"❌ Network error: {e}")
             return False
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error("Unexpected error downloading latest", e)
+            self._log_error("Unexpected error downloading latest", e, tb=True)
             print(f"❌ Unexpected error: {e}")
             return False
     
     def _download_image(self, image_url, image_name, date_str, output_dir='.', filename=None, save_to_cache=True):
         """Helper method to download and save image"""
+        import requests
+        from urllib3.exceptions import HTTPError as Urllib3Error
+        
+        # The raw read path surfaces urllib3 errors that requests would otherwise wrap
+        network_errors = (requests.RequestException, Urllib3Error)
+        
         try:
-            if self.log_manager:
-                self.log_manager.log_info(f"Starting download: {image_name}")
+            self._log_info(f"Starting download: {image_name}")
             
             print(f"📥 Downloading image: {image_name}")
             print(f"📅 Date: {date_str}")
             print(f"🔗 URL: {image_url}")
             
-            headers = {
-                'User-Agent': f'eimg/{__version__} (Earth Image Downloader)',
-                'Accept': 'image/png'
-            }
-            
-            img_response = requests.get(image_url, timeout=60, stream=True, headers=headers)
-            img_response.raise_for_status()
-            
+            started = datetime.now()
             if filename is None:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                timestamp = started.strftime("%Y%m%d_%H%M%S")
                 filename = f"earth_{timestamp}.png"
             
             if not filename.lower().endswith('.png'):
                 filename += '.png'
             
-            filename = "".join(c for c in filename if c.isalnum() or c in '._-')
+            filename = _FILENAME_UNSAFE_RE.sub('', filename)
             
             output_path = Path(output_dir)
-            output_path.mkdir(parents=True, exist_ok=True)
+            if not output_path.is_dir():
+                output_path.mkdir(parents=True, exist_ok=True)
             full_path = output_path / filename
             
-            total_size = int(img_response.headers.get('content-length', 0))
-            downloaded = 0
-            image_data = b''
+            caching = save_to_cache and self.cache_manager
+            target_path = self.cache_manager.image_path(filename) if caching else full_path
+            part_path = target_path.with_name(target_path.name + '.part')
             
+            img_response = self.http.get(image_url, timeout=60, stream=True,
+                                         headers=_IMG_HEADERS)
             try:
-                with open(full_path, "wb") as f:
-                    for chunk in img_response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            image_data += chunk
-                            downloaded += len(chunk)
-                            if total_size > 0:
-                                progress = (downloaded / total_size) * 100
-                                print(f"\r📊 Progress: {progress:.1f}%", end='', flush=True)
-            except IOError as e:
-                print(f"\n❌ Error writing file: {e}")
-                return False
+                img_response.raise_for_status()
+                
+                total_size = int(img_response.headers.get('content-length', 0))
+                downloaded = 0
+                digest = hashlib.sha256()
+                last_progress_time = 0.0
+                
+                show_progress = total_size > 0 and sys.stdout.isatty()
+                if show_progress:
+                    chunks = img_response.iter_content(chunk_size=IMAGE_CHUNK_SIZE)
+                else:
+                    # No progress to report, so read the raw stream without the iter_content layer
+                    img_response.raw.decode_content = True
+                    chunks = iter(functools.partial(img_response.raw.read, IMAGE_CHUNK_SIZE), b'')
+                
+                try:
+                    try:
+                        part_file = open(part_path, "wb", buffering=0)
+                    except OSError as e:
+                        if not caching:
+                            raise
+                        # Caching is best-effort, write straight to the output path instead
+                        self._log_error("Image cache not writable, saving without cache", e)
+                        caching = False
+                        target_path = full_path
+                        part_path = target_path.with_name(target_path.name + '.part')
+                        part_file = open(part_path, "wb", buffering=0)
+                    with part_file as f:
+                        preallocated = _preallocate(f, total_size)
+                        for chunk in chunks:
+                            if chunk:
+                                _write_all(f, chunk)
+                                digest.update(chunk)
+                                downloaded += len(chunk)
+                                if show_progress:
+                                    now = time.monotonic()
+                                    if now - last_progress_time >= PROGRESS_INTERVAL:
+                                        last_progress_time = now
+                                        progress = (downloaded / total_size) * 100
+                                        print(f"\r📊 Progress: {progress:.1f}%", end='', flush=True)
+                        if show_progress:
+                            print(f"\r📊 Progress: {downloaded / total_size * 100:.1f}%", end='', flush=True)
+                        # Content-Length counts encoded bytes, so only compare unencoded bodies
+                        encoded = img_response.headers.get('content-encoding', 'identity') != 'identity'
+                        if total_size and not encoded and downloaded != total_size:
+                            raise requests.ConnectionError(
+                                f"Incomplete download: received {downloaded} of {total_size} bytes")
+                        if preallocated and downloaded != total_size:
+                            f.truncate(downloaded)
+                    os.replace(part_path, target_path)
+                except network_errors:
+                    raise
+                except IOError as e:
+                    print(f"\n❌ Error writing file: {e}")
+                    return False
+            finally:
+                img_response.close()
+                # Never leave a truncated image behind, without masking the outcome above
+                try:
+                    os.unlink(part_path)
+                except OSError:
+                    pass
             
-            if save_to_cache and self.cache_manager:
+            if caching:
+                _link_or_copy(target_path, full_path)
                 metadata = {
                     'image_name': image_name,
                     'date': date_str,
                     'url': image_url,
-                    'download_time': datetime.now().isoformat(),
-                    'file_size': downloaded
+                    'download_time': started.isoformat(),
+                    'file_size': downloaded,
+                    'sha256': digest.hexdigest()
                 }
-                self.cache_manager.save_image_to_cache(image_data, filename, metadata)
+                self.cache_manager.save_image_to_cache(target_path, filename, metadata)
             
             print(f"\n✅ Image saved to: {full_path}")
             print(f"📊 File size: {downloaded / 1024 / 1024:.2f} MB")
             
-            if self.log_manager:
-                self.log_manager.log_status(f"Download completed: {filename} ({downloaded} bytes)")
+            self._log_status(f"Download completed: {filename} ({downloaded} bytes)")
             return True
             
+        except network_errors as e:
+            self._log_error("Download failed", e)
+            print(f"\n❌ Download error: {e}")
+            return False
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error("Download failed", e)
+            self._log_error("Download failed", e, tb=True)
             print(f"\n❌ Download error: {e}")
             return False
     
@@ -896,8 +1313,7 @@ class EarthImageDownloader:
                 print("   ❌ Cache directory not found")
                 
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error("Failed to show cache info", e)
+            self._log_error("Failed to show cache info", e, tb=True)
             print(f"❌ Error showing cache info: {e}")
     
     def clear_cache_command(self, cache_type="all"):
@@ -911,8 +1327,7 @@ class EarthImageDownloader:
             cleared = self.cache_manager.clear_cache(cache_type)
             print(f"✅ Cleared {cleared} files from cache")
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error("Failed to clear cache", e)
+            self._log_error("Failed to clear cache", e, tb=True)
             print(f"❌ Error clearing cache: {e}")
     
     def show_logs_info(self):
@@ -921,8 +1336,8 @@ class EarthImageDownloader:
             print("📋 Logs Information:")
             print(f"   📁 Logs directory: {LOGS_DIR}")
             
-            if LOGS_DIR.exists():
-                log_files = list(LOGS_DIR.glob("*.log"))
+            log_files = _scan_log_files()
+            if log_files is not None:
                 print(f"   📄 Log files: {len(log_files)}")
                 
                 for log_file in log_files:
@@ -950,13 +1365,12 @@ class EarthImageDownloader:
                 return False
             
             cleared = 0
-            if LOGS_DIR.exists():
-                for log_file in LOGS_DIR.glob("*.log"):
-                    try:
-                        log_file.unlink()
-                        cleared += 1
-                    except OSError:
-                        continue
+            for log_file in _scan_log_files() or []:
+                try:
+                    os.unlink(log_file.path)
+                    cleared += 1
+                except OSError:
+                    continue
             
             print(f"✅ Cleared {cleared} log files")
             
@@ -969,13 +1383,15 @@ class EarthImageDownloader:
     
     def open_directory(self, dir_type):
         """Open directory in file manager"""
+        import subprocess
+        
         try:
             if dir_type == "cache":
                 directory = CACHE_DIR
             elif dir_type == "logs":
                 directory = LOGS_DIR
             elif dir_type == "config":
-                directory = CONFIG_DIR
+                directory = self.config_dir
             else:
                 print("❌ Unknown directory type. Use: cache, logs, config")
                 return
@@ -983,7 +1399,7 @@ class EarthImageDownloader:
             if not directory.exists():
                 directory.mkdir(parents=True, exist_ok=True)
             
-            system = platform.system()
+            system = _platform_system()
             try:
                 if system == "Windows":
                     subprocess.run(["explorer", str(directory)], check=True)
@@ -996,15 +1412,13 @@ class EarthImageDownloader:
                     return
                 
                 print(f"📁 Opened {dir_type} directory")
-                if self.log_manager:
-                    self.log_manager.log_info(f"Opened {dir_type} directory")
+                self._log_info(f"Opened {dir_type} directory")
             except subprocess.CalledProcessError:
                 print(f"❌ Could not open directory automatically")
                 print(f"📁 Manual path: {directory}")
             
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error(f"Failed to open {dir_type} directory", e)
+            self._log_error(f"Failed to open {dir_type} directory", e, tb=True)
             print(f"❌ Error opening directory: {e}")
             print(f"📁 Manual path: {directory}")
     
@@ -1012,7 +1426,7 @@ class EarthImageDownloader:
         """Show current configuration"""
         try:
             print("⚙️  Current Configuration:")
-            print(f"   📁 Config file: {CONFIG_FILE}")
+            print(f"   📁 Config file: {self.config_file}")
             
             if 'encrypted_api_key' in self.config:
                 print("   🔐 API key: ✅ Encrypted and stored securely")
@@ -1023,13 +1437,13 @@ class EarthImageDownloader:
             else:
                 print("   🔑 API key: ❌ Not set")
             
-            print(f"   📂 Config directory: {CONFIG_DIR}")
-            print(f"   🔐 Encryption available: {'✅' if CRYPTO_AVAILABLE else '❌'}")
+            print(f"   📂 Config directory: {self.config_dir}")
+            print(f"   🔐 Encryption available: {'✅' if _load_crypto() else '❌'}")
             
             if os.name != 'nt': 
                 try:
-                    if CONFIG_DIR.exists():
-                        config_perms = oct(CONFIG_DIR.stat().st_mode)[-3:]
+                    if self.config_dir.exists():
+                        config_perms = oct(self.config_dir.stat().st_mode)[-3:]
                         if config_perms == '700':
                             print("   🛡️  Directory permissions: ✅ Secure (700)")
                         else:
@@ -1038,7 +1452,7 @@ class EarthImageDownloader:
                     print("   🛡️  Directory permissions: ❓ Unknown")
 
             try:
-                test_file = CONFIG_DIR / "test_write"
+                test_file = self.config_dir / "test_write"
                 test_file.touch()
                 test_file.unlink()
                 print("   ✅ Config directory is writable")
@@ -1046,8 +1460,7 @@ class EarthImageDownloader:
                 print("   ❌ Config directory is not writable")
                 
         except Exception as e:
-            if self.log_manager:
-                self.log_manager.log_error("Error showing config", e)
+            self._log_error("Error showing config", e, tb=True)
             print(f"❌ Error showing config: {e}")
     
     def show_help(self):
@@ -1073,7 +1486,7 @@ COMMANDS:
   
 CACHE MANAGEMENT:
   cache-info             Show cache information and statistics
-  cache-clear [type]     Clear cache (all/images/metadata/thumbnails)
+  cache-clear [type]     Clear cache (all/images/metadata/thumbnails/api)
   open-cache             Open cache directory in file manager
   
 LOGS MANAGEMENT:
@@ -1112,32 +1525,134 @@ LICENSE:
 """
         print(help_text)
 
-def main():
+def _cmd_download_date(downloader, args):
+    """Handle download-date command"""
+    if args.date:
+        downloader.download_by_date(args.date, args.output, args.filename, not args.no_cache)
+    else:
+        print("❌ Error: Date required for download-date command. Format: YYYY-MM-DD")
+
+def _cmd_test(downloader, args):
+    """Handle test command"""
     try:
-        parser = argparse.ArgumentParser(
-            prog='eimg',
-            description='Download Earth images from NASA EPIC API',
-            add_help=False
-        )
+        from tests.test_runner import run_all_tests
+        run_all_tests()
+    except ImportError:
+        print("❌ Tests not available. Check if tests directory exists.")
+
+def _cmd_set(downloader, args):
+    """Handle set API=<key> command"""
+    if args.assignment and '=' in args.assignment:
+        name, value = args.assignment.split('=', 1)
+        if name.strip() == 'API':
+            downloader.set_api_key(value.strip())
+            return
+    print("❌ Invalid set command. Use: python main.py set API=your_key_here")
+
+def _cmd_version(downloader, args):
+    """Handle version command"""
+    print(f"🌍 eimg v{__version__} by {__author__}")
+    print(f"🔐 Security features: API encryption ({'✅' if _load_crypto() else '❌'}), secure permissions")
+    print("💾 Cache features: Local storage, metadata tracking")
+    print("📋 Logging features: Error tracking, status monitoring")
+
+COMMANDS = {
+    'help': lambda d, a: d.show_help(),
+    'download': lambda d, a: d.download_latest(a.output, a.filename, not a.no_cache),
+    'download-date': _cmd_download_date,
+    'dates': lambda d, a: d.get_available_dates(),
+    'metadata': lambda d, a: d.show_metadata(a.date),
+    'validate': lambda d, a: d.validate_api_key(),
+    'wipe': lambda d, a: d.wipe_config(),
+    'cache-info': lambda d, a: d.show_cache_info(),
+    'cache-clear': lambda d, a: d.clear_cache_command(a.cache_type),
+    'open-cache': lambda d, a: d.open_directory("cache"),
+    'logs-info': lambda d, a: d.show_logs_info(),
+    'logs-clear': lambda d, a: d.clear_logs_command(),
+    'open-logs': lambda d, a: d.open_directory("logs"),
+    'open-config': lambda d, a: d.open_directory("config"),
+    'test': _cmd_test,
+    'config': lambda d, a: d.show_config(),
+    'version': _cmd_version,
+    'set': _cmd_set,
+}
+
+class _CliParser(argparse.ArgumentParser):
+    """ArgumentParser that reports usage errors the way the rest of the CLI does"""
+    
+    def error(self, message):
+        print(f"❌ {message}")
+        print("Use 'python main.py help' for available commands")
+        sys.exit(2)
+
+def _add_download_options(parser, suppress=False):
+    """Add the download options; suppressed defaults keep values given before the command"""
+    def default(value):
+        return argparse.SUPPRESS if suppress else value
+    
+    parser.add_argument('--output', '-o', default=default('.'),
+                        help='Output directory (default: current directory)')
+    parser.add_argument('--filename', '-f', default=default(None),
+                        help='Output filename (default: auto-generated)')
+    parser.add_argument('--no-cache', action='store_true', default=default(False),
+                        help='Don\'t save to cache')
+
+def build_parser():
+    """Build the CLI parser with one subparser per command"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--help', '-h', action='store_true',
+                        default=argparse.SUPPRESS, help='Show help')
+    
+    download_options = argparse.ArgumentParser(add_help=False)
+    _add_download_options(download_options, suppress=True)
+    
+    parser = _CliParser(
+        prog='eimg',
+        description='Download Earth images from NASA EPIC API',
+        add_help=False
+    )
+    parser.add_argument('--help', '-h', action='store_true',
+                        help='Show help')
+    # Also accepted before the command, as in: eimg --output x download
+    _add_download_options(parser)
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    
+    for name, handler in COMMANDS.items():
+        parents = [common, download_options] if name in ('download', 'download-date') else [common]
+        subparser = subparsers.add_parser(name, add_help=False, parents=parents)
+        subparser.set_defaults(func=handler)
         
-        parser.add_argument('command', nargs='?', default='help',
-                           help='Command to execute')
-        parser.add_argument('date_or_type', nargs='?',
-                           help='Date for date-specific commands (YYYY-MM-DD) or cache type')
-        parser.add_argument('--output', '-o', default='.', 
-                   help='Output directory (default: current directory)')
-        parser.add_argument('--filename', '-f',
-                           help='Output filename (default: auto-generated)')
-        parser.add_argument('--no-cache', action='store_true',
-                           help='Don\'t save to cache')
-        parser.add_argument('--help', '-h', action='store_true',
-                           help='Show help')
+        if name in ('download-date', 'metadata'):
+            subparser.add_argument('date', nargs='?',
+                                   help='Date (YYYY-MM-DD)')
+        elif name == 'cache-clear':
+            subparser.add_argument('cache_type', nargs='?', default='all',
+                                   help='Cache type: all, images, metadata, thumbnails, api')
+        elif name == 'set':
+            subparser.add_argument('assignment', nargs='?',
+                                   help='Setting to change (API=<key>)')
+    
+    return parser
+
+_PARSER = build_parser()
+
+def main():
+    try:
+        argv = sys.argv[1:]
+        # Accept the quoted form: python main.py "set API=<key>"
+        if argv and argv[0].startswith('set '):
+            argv = argv[0].split(None, 1) + argv[1:]
         
-        if len(sys.argv) == 1:
+        if not argv:
             EarthImageDownloader().show_help()
             return
         
-        args = parser.parse_args()
+        if not argv[0].startswith('-') and argv[0] not in COMMANDS:
+            print(f"❌ Unknown command: {argv[0]}")
+            print("Use 'python main.py help' for available commands")
+            return
+        
+        args = _PARSER.parse_args(argv)
         
         try:
             downloader = EarthImageDownloader()
@@ -1145,66 +1660,10 @@ def main():
             print(f"❌ Failed to initialize downloader: {e}")
             return
         
-        if args.help or args.command == 'help':
-            downloader.show_help()
-        elif args.command == 'download':
-            downloader.download_latest(args.output, args.filename)
-        elif args.command == 'download-date':
-            if args.date_or_type:
-                downloader.download_by_date(args.date_or_type, args.output, args.filename)
-            else:
-                print("❌ Error: Date required for download-date command. Format: YYYY-MM-DD")
-        elif args.command == 'dates':
-            downloader.get_available_dates()
-        elif args.command == 'metadata':
-            downloader.show_metadata(args.date_or_type)
-        elif args.command == 'validate':
-            downloader.validate_api_key()
-        elif args.command == 'wipe':
-            downloader.wipe_config()
-        elif args.command == 'cache-info':
-            downloader.show_cache_info()
-        elif args.command == 'cache-clear':
-            cache_type = args.date_or_type if args.date_or_type else "all"
-            downloader.clear_cache_command(cache_type)
-        elif args.command == 'open-cache':
-            downloader.open_directory("cache")
-        elif args.command == 'logs-info':
-            downloader.show_logs_info()
-        elif args.command == 'logs-clear':
-            downloader.clear_logs_command()
-        elif args.command == 'open-logs':
-            downloader.open_directory("logs")
-        elif args.command == 'open-config':
-            downloader.open_directory("config")
-        elif args.command == 'test':
-            try:
-                from tests.test_runner import run_all_tests
-                run_all_tests()
-            except ImportError:
-                print("❌ Tests not available. Check if tests directory exists.")
-        elif args.command.startswith('set'):
-            if '=' in args.command:
-                try:
-                    key_value = args.command.split('=', 1)
-                    if key_value[0].strip() == 'set API':
-                        downloader.set_api_key(key_value[1].strip())
-                    else:
-                        print("❌ Invalid set command. Use: python main.py set API=your_key_here")
-                except IndexError:
-                    print("❌ Invalid set command format. Use: python main.py set API=your_key_here")
-            else:
-                print("❌ Invalid set command. Use: python main.py set API=your_key_here")
-        elif args.command == 'config':
-            downloader.show_config()
-        elif args.command == 'version':
-            print(f"🌍 eimg v{__version__} by {__author__}")
-            print(f"🔐 Security features: API encryption ({'✅' if CRYPTO_AVAILABLE else '❌'}), secure permissions")
-            print("💾 Cache features: Local storage, metadata tracking")
-            print("📋 Logging features: Error tracking, status monitoring")
-        else:
-            print(f"❌ Unknown command: {args.command}")
-            print("Use 'python main.py help' for available commands")
+        handler = COMMANDS['help'] if args.help or not args.command else args.func
+        
+        with downloader:
+            handler(downloader, args)
             
     except KeyboardInterrupt:
         print("\n\n⚡ Operation cancelled by user")
@@ -0,0 +1,38 @@
+"""
+Shared pytest configuration and fixtures for Earth Image Downloader tests
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import main
+from main import SecurityManager, EarthImageDownloader
+
+@pytest.fixture
+def security_manager():
+    """SecurityManager with a low PBKDF2 iteration count for fast tests"""
+    return SecurityManager(iterations=1000)
+
+@pytest.fixture(scope="module")
+def shared_downloader(tmp_path_factory):
+    """One downloader per test module, with config, logs and cache in a temporary directory"""
+    base_dir = tmp_path_factory.mktemp("eimg")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(main, "LOGS_DIR", base_dir / "logs")
+        mp.setattr(main, "CACHE_DIR", base_dir / "cache")
+        with EarthImageDownloader(config_dir=base_dir / ".eimg") as downloader:
+            yield downloader
+
+@pytest.fixture
+def downloader(shared_downloader):
+    """Shared downloader reset to an empty configuration"""
+    try:
+        shared_downloader.config_file.unlink()
+    except FileNotFoundError:
+        pass
+    shared_downloader.config.clear()
+    return shared_downloader
@@ -56,6 +56,32 @@ class TestCacheManager(unittest.TestCase):
         self.assertIn('thumbnails', stats)
         print("   ✅ Cache statistics working correctly")
     
+    def test_cache_stats_skips_unreadable_entries(self):
+        """Test one vanished or linked image does not drop the rest"""
+        print("💾 Testing cache statistics with unreadable entries...")
+        
+        import os
+        from unittest.mock import patch
+        images_dir = Path(self.cache_manager._img_dir)
+        for name in ("a.png", "b.png", "c.png"):
+            (images_dir / name).write_bytes(b"x" * 10)
+        os.symlink(images_dir / "a.png", images_dir / "link.png")
+        
+        real_iter = self.cache_manager._iter_entries
+        
+        def vanishing(directory, suffix):
+            for entry in real_iter(directory, suffix):
+                if entry.name == "b.png":
+                    os.unlink(entry.path)
+                yield entry
+        
+        with patch.object(self.cache_manager, '_iter_entries', side_effect=vanishing):
+            stats = self.cache_manager.get_cache_stats()
+        
+        self.assertEqual(stats['images'], 2)
+        self.assertEqual(stats['total_size'], 20)
+        print("   ✅ Unreadable cache entries skipped correctly")
+    
     def test_save_image_to_cache(self):
         """Test saving image to cache"""
         print("💾 Testing image caching...")
@@ -87,6 +113,23 @@ class TestCacheManager(unittest.TestCase):
         self.assertEqual(cached_metadata['date'], test_metadata['date'])
         print("   ✅ Image caching working correctly")
     
+    def test_save_image_from_file(self):
+        """Test caching image from a file path and a file object"""
+        print("💾 Testing image caching from file...")
+        
+        source = Path(self.temp_dir) / "source.png"
+        source.write_bytes(b"streamed_png_data" * 1024)
+        
+        cache_path = self.cache_manager.save_image_to_cache(source, "from_path.png")
+        self.assertIsNotNone(cache_path)
+        self.assertEqual(cache_path.read_bytes(), source.read_bytes())
+        
+        with open(source, 'rb') as f:
+            cache_path = self.cache_manager.save_image_to_cache(f, "from_file.png")
+        self.assertIsNotNone(cache_path)
+        self.assertEqual(cache_path.read_bytes(), source.read_bytes())
+        print("   ✅ File-based image caching working correctly")
+    
     def test_clear_cache(self):
         """Test cache clearing"""
         print("💾 Testing cache clearing...")
@@ -101,10 +144,18 @@ class TestCacheManager(unittest.TestCase):
         test_image.write_text("test image")
         test_metadata.write_text("test metadata")
         
+        import os
+        outside = Path(self.temp_dir) / "outside.png"
+        outside.write_text("not cached")
+        test_link = images_dir / "link.png"
+        os.symlink(outside, test_link)
+        
         cleared = self.cache_manager.clear_cache("all")
         self.assertGreater(cleared, 0)
         self.assertFalse(test_image.exists())
         self.assertFalse(test_metadata.exists())
+        self.assertFalse(os.path.lexists(test_link))
+        self.assertTrue(outside.exists())
         print("   ✅ Cache clearing working correctly")
 
 if __name__ == "__main__":
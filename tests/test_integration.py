@@ -9,6 +9,7 @@ import shutil
 from pathlib import Path
 import sys
 import json
+import io
 from unittest.mock import patch, MagicMock
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -23,12 +24,10 @@ class TestIntegration(unittest.TestCase):
         self.temp_dir = tempfile.mkdtemp()
         
         import main
-        main.CONFIG_DIR = Path(self.temp_dir) / ".eimg"
-        main.CONFIG_FILE = main.CONFIG_DIR / "config.json"
         main.LOGS_DIR = Path(self.temp_dir) / "logs"
         main.CACHE_DIR = Path(self.temp_dir) / "cache"
         
-        self.downloader = EarthImageDownloader()
+        self.downloader = EarthImageDownloader(config_dir=Path(self.temp_dir) / ".eimg")
     
     def tearDown(self):
         """Clean up test environment"""
@@ -47,17 +46,25 @@ class TestIntegration(unittest.TestCase):
         self.assertTrue(main.CACHE_DIR.exists())
         print("   ✅ Full initialization successful")
     
-    @patch('requests.get')
-    def test_download_with_cache(self, mock_get):
+    def test_plain_command_writes_no_logs(self):
+        """Test startup and read-only commands do not create log files"""
+        print("🔧 Testing log files are not created on startup...")
+        
+        import main
+        self.downloader.show_cache_info()
+        self.assertEqual(list(main.LOGS_DIR.glob("*.log")), [])
+        print("   ✅ No log files created on startup")
+    
+    def test_download_with_cache(self):
         """Test download functionality with caching"""
         print("🔧 Testing download with cache...")
         
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.headers = {'content-length': '1024'}
+        mock_response.headers = {'content-length': '15'}
         mock_response.iter_content.return_value = [b'fake_image_data']
+        mock_response.raw = io.BytesIO(b'fake_image_data')
         mock_response.raise_for_status.return_value = None
-        mock_get.return_value = mock_response
         
         api_data = [{
             'image': 'test_image_123',
@@ -65,11 +72,13 @@ class TestIntegration(unittest.TestCase):
         }]
         
         with patch.object(self.downloader, 'get_api_key', return_value='test_api_key'), \
-             patch('requests.get') as mock_api_get:
-
+             patch.object(self.downloader.http, 'head'), \
+             patch.object(self.downloader.http, 'get') as mock_api_get:
+            
             mock_api_response = MagicMock()
             mock_api_response.status_code = 200
-            mock_api_response.json.return_value = api_data
+            mock_api_response.content = json.dumps(api_data).encode()
+            mock_api_response.headers = {}
             mock_api_response.raise_for_status.return_value = None
             
             def side_effect(url, **kwargs):
@@ -90,8 +99,254 @@ class TestIntegration(unittest.TestCase):
             stats = self.downloader.cache_manager.get_cache_stats()
             self.assertGreater(stats['images'], 0)
             
+            import os
+            cached_file = self.downloader.cache_manager.image_path("test_earth.png")
+            self.assertTrue(os.path.samefile(cached_file, output_file))
+            
+            import hashlib
+            import main
+            metadata_path = main.CACHE_DIR / "metadata" / "test_earth.png.json"
+            metadata = json.loads(metadata_path.read_text())
+            self.assertEqual(metadata['sha256'], hashlib.sha256(b'fake_image_data').hexdigest())
+            
         print("   ✅ Download with cache working correctly")
     
+    def test_download_with_progress(self):
+        """Test interactive download path with progress output"""
+        print("🔧 Testing download with progress...")
+        
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.headers = {'content-length': '30'}
+        mock_response.iter_content.return_value = [b'a' * 10, b'b' * 10, b'c' * 10]
+        mock_response.raise_for_status.return_value = None
+        
+        with patch.object(self.downloader.http, 'get', return_value=mock_response), \
+             patch.object(sys.stdout, 'isatty', return_value=True):
+            result = self.downloader._download_image(
+                "https://epic.gsfc.nasa.gov/test.png", "test", "2025-01-15",
+                self.temp_dir, "progress.png", save_to_cache=False
+            )
+        
+        self.assertTrue(result)
+        output_file = Path(self.temp_dir) / "progress.png"
+        self.assertEqual(output_file.read_bytes(), b'a' * 10 + b'b' * 10 + b'c' * 10)
+        print("   ✅ Download with progress working correctly")
+    
+    def test_conditional_api_request(self):
+        """Test API responses are revalidated with ETag"""
+        print("🔧 Testing conditional API requests...")
+        
+        dates = ['2025-01-15', '2025-01-14']
+        first = MagicMock()
+        first.status_code = 200
+        first.content = json.dumps(dates).encode()
+        first.headers = {'ETag': '"abc123"'}
+        first.raise_for_status.return_value = None
+        
+        not_modified = MagicMock()
+        not_modified.status_code = 304
+        not_modified.headers = {}
+        
+        with patch.object(self.downloader.http, 'get', side_effect=[first, not_modified]) as mock_get:
+            self.assertEqual(self.downloader._get_api_json("available", "test_api_key"), dates)
+            self.assertEqual(self.downloader._get_api_json("available", "test_api_key"), dates)
+            
+            second_headers = mock_get.call_args_list[1][1]['headers']
+            self.assertEqual(second_headers.get('If-None-Match'), '"abc123"')
+            not_modified.json.assert_not_called()
+        
+        import main
+        self.assertEqual(len(list((main.CACHE_DIR / "api").glob("*.json"))), 1)
+        self.assertEqual(self.downloader.cache_manager.get_cache_stats()['metadata_files'], 0)
+        self.downloader.cache_manager.clear_cache("metadata")
+        self.assertIsNotNone(self.downloader.cache_manager.get_cached_response("available"))
+        print("   ✅ Conditional API requests working correctly")
+    
+    def test_date_validation(self):
+        """Test date format validation"""
+        print("🔧 Testing date validation...")
+        
+        from main import _valid_date
+        self.assertTrue(_valid_date("2025-01-15"))
+        self.assertTrue(_valid_date("2024-02-29"))
+        
+        self.assertFalse(_valid_date("2025-02-29"))
+        self.assertFalse(_valid_date("2025-13-01"))
+        self.assertFalse(_valid_date("2025-00-10"))
+        self.assertFalse(_valid_date("2025-1-15"))
+        self.assertFalse(_valid_date("2025-01-15x"))
+        self.assertFalse(_valid_date(None))
+        self.assertFalse(_valid_date("٢٠٢٥-٠١-١٥"))
+        self.assertFalse(_valid_date("0000-01-01"))
+        print("   ✅ Date validation working correctly")
+    
+    def test_interrupted_download(self):
+        """Test a failed download leaves no partial image behind"""
+        print("🔧 Testing interrupted download...")
+        
+        from urllib3.exceptions import ProtocolError
+        mock_response = MagicMock()
+        mock_response.headers = {'content-length': '1024'}
+        mock_response.raise_for_status.return_value = None
+        mock_response.raw.read.side_effect = [b'partial_data', ProtocolError("Connection broken")]
+        
+        with patch.object(self.downloader.http, 'get', return_value=mock_response), \
+             patch.object(self.downloader, '_log_error') as mock_log_error:
+            result = self.downloader._download_image(
+                "https://example.com/image.png", "test_image", "2025-01-15",
+                self.temp_dir, "broken.png", save_to_cache=False
+            )
+        
+        self.assertFalse(result)
+        self.assertEqual(list(Path(self.temp_dir).glob("broken.png*")), [])
+        self.assertNotIn('tb', mock_log_error.call_args.kwargs)
+        print("   ✅ Interrupted download cleaned up correctly")
+    
+    def test_download_without_writable_cache(self):
+        """Test an unusable cache directory does not fail the download"""
+        print("🔧 Testing download with unwritable cache...")
+        
+        blocker = Path(self.temp_dir) / "not_a_dir"
+        blocker.write_text("file")
+        self.downloader.cache_manager._img_dir = str(blocker / "images")
+        
+        mock_response = MagicMock()
+        mock_response.headers = {'content-length': '15'}
+        mock_response.raise_for_status.return_value = None
+        mock_response.raw = io.BytesIO(b'fake_image_data')
+        
+        with patch.object(self.downloader.http, 'get', return_value=mock_response):
+            result = self.downloader._download_image(
+                "https://example.com/image.png", "test_image", "2025-01-15",
+                self.temp_dir, "nocache.png"
+            )
+        
+        self.assertTrue(result)
+        self.assertEqual((Path(self.temp_dir) / "nocache.png").read_bytes(), b'fake_image_data')
+        print("   ✅ Download without writable cache working correctly")
+    
+    def test_write_error_reported_once(self):
+        """Test a failing .part cleanup does not override the write error result"""
+        print("🔧 Testing write error reporting...")
+        
+        blocker = Path(self.temp_dir) / "blocker"
+        blocker.write_text("file")
+        
+        mock_response = MagicMock()
+        mock_response.headers = {'content-length': '15'}
+        mock_response.raise_for_status.return_value = None
+        mock_response.raw = io.BytesIO(b'fake_image_data')
+        
+        with patch.object(self.downloader.http, 'get', return_value=mock_response), \
+             patch.object(Path, 'is_dir', return_value=True), \
+             patch.object(self.downloader, '_log_error') as mock_log_error, \
+             patch('builtins.print') as mock_print:
+            result = self.downloader._download_image(
+                "https://example.com/image.png", "test_image", "2025-01-15",
+                str(blocker), "out.png", save_to_cache=False
+            )
+        
+        self.assertFalse(result)
+        mock_log_error.assert_not_called()
+        printed = [call.args[0] for call in mock_print.call_args_list if call.args]
+        self.assertFalse(any("Download error" in line for line in printed))
+        print("   ✅ Write error reported correctly")
+    
+    def test_truncated_download(self):
+        """Test a body shorter than Content-Length is rejected"""
+        print("🔧 Testing truncated download...")
+        
+        mock_response = MagicMock()
+        mock_response.headers = {'content-length': '1024'}
+        mock_response.raise_for_status.return_value = None
+        mock_response.raw = io.BytesIO(b'partial_data')
+        
+        with patch.object(self.downloader.http, 'get', return_value=mock_response):
+            result = self.downloader._download_image(
+                "https://example.com/image.png", "test_image", "2025-01-15",
+                self.temp_dir, "short.png", save_to_cache=False
+            )
+        
+        self.assertFalse(result)
+        self.assertEqual(list(Path(self.temp_dir).glob("short.png*")), [])
+        print("   ✅ Truncated download rejected correctly")
+    
+    def test_filename_sanitizing(self):
+        """Test unsafe characters are stripped from filenames"""
+        print("🔧 Testing filename sanitizing...")
+        
+        from main import _FILENAME_UNSAFE_RE
+        for name in ["earth/../../etc passwd.png", "зем ля_2025-01-15.png", "a\\b:c*d?.png"]:
+            expected = "".join(c for c in name if c.isalnum() or c in '._-')
+            self.assertEqual(_FILENAME_UNSAFE_RE.sub('', name), expected)
+        print("   ✅ Filename sanitizing working correctly")
+    
+    def test_command_dispatch(self):
+        """Test CLI commands are routed to downloader methods"""
+        print("🔧 Testing command dispatch...")
+        
+        from main import _PARSER as parser, COMMANDS
+        downloader = MagicMock()
+        args = parser.parse_args(['cache-clear'])
+        self.assertIs(args.func, COMMANDS['cache-clear'])
+        args.func(downloader, args)
+        downloader.clear_cache_command.assert_called_once_with("all")
+        
+        args = parser.parse_args(['download-date', '2025-01-15', '-o', 'out'])
+        args.func(downloader, args)
+        downloader.download_by_date.assert_called_once_with('2025-01-15', 'out', None, True)
+        
+        args = parser.parse_args(['download', '--no-cache'])
+        args.func(downloader, args)
+        downloader.download_latest.assert_called_once_with('.', None, False)
+        
+        args = parser.parse_args(['set', 'API=abc'])
+        args.func(downloader, args)
+        downloader.set_api_key.assert_called_once_with('abc')
+        
+        self.assertTrue(parser.parse_args(['download', '--help']).help)
+        self.assertEqual(parser.parse_args(['--output', 'x', 'download']).output, 'x')
+        self.assertEqual(parser.parse_args(['-o', 'x', 'download', '-o', 'y']).output, 'y')
+        self.assertEqual(parser.parse_args(['download']).output, '.')
+        
+        import main
+        with patch.object(sys, 'argv', ['main.py', 'bogus']), \
+             patch('builtins.print') as mock_print, \
+             patch.object(main, 'EarthImageDownloader') as mock_downloader:
+            main.main()
+        mock_print.assert_any_call("❌ Unknown command: bogus")
+        mock_downloader.assert_not_called()
+        print("   ✅ Command dispatch working correctly")
+    
+    def test_http_session_reused(self):
+        """Test shared HTTP session configuration"""
+        print("🔧 Testing HTTP session reuse...")
+        
+        import requests
+        self.assertIsInstance(self.downloader.http, requests.Session)
+        self.assertIs(self.downloader.http, self.downloader.http)
+        adapter = self.downloader.http.get_adapter('https://api.nasa.gov/')
+        self.assertEqual(adapter.max_retries.total, 3)
+        self.assertIn('eimg/', self.downloader.http.headers['User-Agent'])
+        self.assertNotEqual(self.downloader.http.headers.get('Connection'), 'close')
+        print("   ✅ HTTP session configured correctly")
+    
+    def test_image_host_warmup(self):
+        """Test image host connection warm-up runs in the background"""
+        print("🔧 Testing image host warm-up...")
+        
+        with patch.object(self.downloader.http, 'head') as mock_head:
+            thread = self.downloader._warm_image_host()
+            self.assertIs(self.downloader._warm_image_host(), thread)
+            self.downloader.close()
+        
+        self.assertTrue(thread.daemon)
+        self.assertFalse(thread.is_alive())
+        mock_head.assert_called_once()
+        self.assertTrue(mock_head.call_args[0][0].startswith('https://epic.gsfc.nasa.gov'))
+        print("   ✅ Image host warm-up working correctly")
+    
     def test_error_handling(self):
         """Test error handling across components"""
         print("🔧 Testing error handling...")
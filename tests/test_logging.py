@@ -54,6 +54,82 @@ class TestLogManager(unittest.TestCase):
         self.assertGreater(len(log_files), 0)
         print(f"   ✅ Created {len(log_files)} log files")
     
+    def test_close_releases_handlers(self):
+        """Test closing the manager detaches its file handlers"""
+        print("📋 Testing log handler release...")
+        
+        import logging
+        handlers = [handler for _, handler in self.log_manager._handlers]
+        self.log_manager.close()
+        
+        for logger in (logging.root, self.log_manager.error_logger, self.log_manager.status_logger):
+            for handler in handlers:
+                self.assertNotIn(handler, logger.handlers)
+        print("   ✅ Log handlers released correctly")
+    
+    def test_log_files_opened_lazily(self):
+        """Test log files are only created on first write"""
+        print("📋 Testing lazy log file creation...")
+        
+        import main
+        errors_log = main.LOGS_DIR / "errors.log"
+        self.assertFalse(errors_log.exists())
+        
+        self.log_manager.log_error("First error")
+        self.assertTrue(errors_log.exists())
+        print("   ✅ Log files created on demand")
+    
+    def test_startup_messages_deferred(self):
+        """Test startup messages are only written along with a later entry"""
+        print("📋 Testing deferred startup messages...")
+        
+        import main
+        main_log = main.LOGS_DIR / "eimg.log"
+        self.assertFalse(main_log.exists())
+        
+        self.log_manager.log_status("Something happened")
+        content = main_log.read_text()
+        self.assertEqual(content.count("Logging system initialized"), 1)
+        
+        self.log_manager.log_info("Later message")
+        self.assertEqual(main_log.read_text().count("Logging system initialized"), 1)
+        print("   ✅ Startup messages deferred correctly")
+    
+    def test_log_error_traceback(self):
+        """Test traceback is only logged when requested"""
+        print("📋 Testing error traceback logging...")
+        
+        import main
+        try:
+            raise ValueError("expected failure")
+        except ValueError as e:
+            self.log_manager.log_error("Without traceback", e)
+        try:
+            raise ValueError("unexpected failure")
+        except ValueError as e:
+            self.log_manager.log_error("With traceback", e, tb=True)
+        
+        content = (main.LOGS_DIR / "errors.log").read_text()
+        self.assertIn("Without traceback: expected failure", content)
+        self.assertEqual(content.count("Traceback"), 1)
+        print("   ✅ Error traceback logging working correctly")
+    
+    def test_scan_log_files(self):
+        """Test log files listing"""
+        print("📋 Testing log files scan...")
+        
+        import main
+        self.log_manager.log_error("Error for scan")
+        (main.LOGS_DIR / "notes.txt").write_text("not a log")
+        
+        names = sorted(entry.name for entry in main._scan_log_files())
+        self.assertIn("errors.log", names)
+        self.assertNotIn("notes.txt", names)
+        
+        main.LOGS_DIR = Path(self.temp_dir) / "missing"
+        self.assertIsNone(main._scan_log_files())
+        print("   ✅ Log files scan working correctly")
+    
     def test_log_content(self):
         """Test log file content"""
         print("📋 Testing log content...")
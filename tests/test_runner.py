@@ -3,66 +3,83 @@ Test runner for Earth Image Downloader (eimg)
 Executes all tests and provides debugging information
 """
 
+import io
 import sys
-import os
 import unittest
-import traceback
+import importlib.util
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-def run_all_tests():
-    """Run all tests with detailed output"""
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+RUNNER_BUFFER_SIZE = 64 * 1024
+
+def run_all_tests(use_unittest=False):
+    """Run all tests with pytest (parallel when pytest-xdist is installed) or unittest"""
+    if pytest is None and not use_unittest:
+        # test_security.py is pytest-only, so the unittest fallback could never pass
+        print("❌ The eimg test suite requires pytest")
+        print("   Install with: pip install pytest (or pip install -e .[dev])")
+        return False
+    
     print("🧪 Starting eimg test suite...")
     print("=" * 50)
     
-    loader = unittest.TestLoader()
     start_dir = Path(__file__).parent
-    suite = loader.discover(start_dir, pattern='test_*.py')
     
-    class VerboseTestResult(unittest.TextTestResult):
-        def startTest(self, test):
-            super().startTest(test)
-            print(f"🔍 Running: {test._testMethodName}")
-        
-        def addSuccess(self, test):
-            super().addSuccess(test)
-            print(f"✅ PASS: {test._testMethodName}")
-        
-        def addError(self, test, err):
-            super().addError(test, err)
-            print(f"❌ ERROR: {test._testMethodName}")
-            print(f"   {err[1]}")
-        
-        def addFailure(self, test, err):
-            super().addFailure(test, err)
-            print(f"❌ FAIL: {test._testMethodName}")
-            print(f"   {err[1]}")
+    if pytest is not None and not use_unittest:
+        args = [str(start_dir), "-q"]
+        if importlib.util.find_spec("xdist") is not None:
+            args += ["-n", "auto", "--dist=loadfile"]
+        return pytest.main(args) == 0
     
-    runner = unittest.TextTestRunner(
-        resultclass=VerboseTestResult,
-        verbosity=2,
-        stream=sys.stdout
-    )
+    # Load module by module so files without unittest tests (pytest-only) are reported
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    skipped_modules = []
+    for test_file in sorted(start_dir.glob('test_*.py')):
+        if test_file.name == Path(__file__).name:
+            continue
+        module_suite = loader.discover(start_dir, pattern=test_file.name)
+        if module_suite.countTestCases() == 0:
+            skipped_modules.append(test_file.name)
+        suite.addTests(module_suite)
     
-    result = runner.run(suite)
+    sys.stdout.flush()
+    stdout_buffer = getattr(sys.stdout, 'buffer', None)
+    if stdout_buffer is None:
+        result = unittest.TextTestRunner(stream=sys.stdout).run(suite)
+    else:
+        # Batch the runner's small writes instead of hitting stdout per test
+        stream = io.TextIOWrapper(
+            io.BufferedWriter(stdout_buffer, buffer_size=RUNNER_BUFFER_SIZE),
+            encoding=sys.stdout.encoding,
+            errors='replace',
+            write_through=False
+        )
+        try:
+            result = unittest.TextTestRunner(stream=stream).run(suite)
+        finally:
+            stream.flush()
+            stream.detach().detach()
     
     print("\n" + "=" * 50)
     print("🧪 Test Summary:")
     print(f"   Tests run: {result.testsRun}")
     print(f"   Failures: {len(result.failures)}")
     print(f"   Errors: {len(result.errors)}")
-    print(f"   Success rate: {((result.testsRun - len(result.failures) - len(result.errors)) / result.testsRun * 100):.1f}%")
+    passed = result.testsRun - len(result.failures) - len(result.errors)
+    success_rate = passed / result.testsRun * 100 if result.testsRun else 100.0
+    print(f"   Success rate: {success_rate:.1f}%")
     
-    if result.failures:
-        print("\n❌ Failures:")
-        for test, traceback in result.failures:
-            print(f"   {test}: {traceback}")
-    
-    if result.errors:
-        print("\n❌ Errors:")
-        for test, traceback in result.errors:
-            print(f"   {test}: {traceback}")
+    if skipped_modules:
+        print(f"\n❌ Not run (pytest-only tests): {', '.join(skipped_modules)}")
+        print("   Run the suite with pytest to include them (pip install pytest)")
+        return False
     
     if result.wasSuccessful():
         print("\n🎉 All tests passed!")
@@ -72,4 +89,4 @@ def run_all_tests():
         return False
 
 if __name__ == "__main__":
-    run_all_tests()
+    run_all_tests(use_unittest="--unittest" in sys.argv)
@@ -2,102 +2,195 @@
 Security tests for Earth Image Downloader
 """
 
-import unittest
-import tempfile
-import shutil
-from pathlib import Path
-import sys
 import os
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+import pytest
 
 from main import SecurityManager, EarthImageDownloader
 
-class TestSecurityManager(unittest.TestCase):
-    """Test security functionality"""
-    
-    def setUp(self):
-        """Setup test environment"""
-        self.security = SecurityManager()
-        self.test_data = "test_api_key_12345"
-        self.test_password = "test_password_123"
-    
-    def test_encryption_decryption(self):
-        """Test encryption and decryption"""
-        print("🔐 Testing encryption/decryption...")
-        
-        encrypted = self.security.encrypt_data(self.test_data, self.test_password)
-        self.assertIsNotNone(encrypted)
-        self.assertNotEqual(encrypted, self.test_data)
-        
-        decrypted = self.security.decrypt_data(encrypted, self.test_password)
-        self.assertEqual(decrypted, self.test_data)
-        print("   ✅ Encryption/decryption working correctly")
-    
-    def test_wrong_password(self):
-        """Test decryption with wrong password"""
-        print("🔐 Testing wrong password protection...")
-        
-        encrypted = self.security.encrypt_data(self.test_data, self.test_password)
-        decrypted = self.security.decrypt_data(encrypted, "wrong_password")
-        self.assertIsNone(decrypted)
-        print("   ✅ Wrong password protection working")
-    
-    def test_hash_string(self):
-        """Test string hashing"""
-        print("🔐 Testing string hashing...")
-        
-        hash1 = self.security.hash_string(self.test_data)
-        hash2 = self.security.hash_string(self.test_data)
-        hash3 = self.security.hash_string("different_data")
-        
-        self.assertIsNotNone(hash1)
-        self.assertEqual(hash1, hash2)
-        self.assertNotEqual(hash1, hash3)
-        print("   ✅ String hashing working correctly")
-    
-    def test_api_key_validation(self):
-        """Test API key format validation"""
-        print("🔐 Testing API key validation...")
-        
-        self.assertTrue(self.security.validate_api_key_format("abcdefghijklmnopqrstuvwxyz1234567890"))
-        self.assertTrue(self.security.validate_api_key_format("ABC123DEF456GHI789JKL012MNO345PQR678"))
-        
-        self.assertFalse(self.security.validate_api_key_format(""))
-        self.assertFalse(self.security.validate_api_key_format("short"))
-        self.assertFalse(self.security.validate_api_key_format(None))
-        print("   ✅ API key validation working correctly")
-
-class TestEarthImageDownloader(unittest.TestCase):
-    """Test main application functionality"""
-    
-    def setUp(self):
-        """Setup test environment"""
-        self.temp_dir = tempfile.mkdtemp()
-        self.original_config_dir = Path.home() / ".eimg"
-        
-        import main
-        main.CONFIG_DIR = Path(self.temp_dir) / ".eimg"
-        main.CONFIG_FILE = main.CONFIG_DIR / "config.json"
-        
-        self.downloader = EarthImageDownloader()
-    
-    def tearDown(self):
-        """Clean up test environment"""
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-    
-    def test_config_operations(self):
-        """Test configuration operations"""
-        print("⚙️ Testing configuration operations...")
-        
-        self.assertEqual(self.downloader.config, {})
-        
-        self.downloader.config['test_key'] = 'test_value'
-        self.assertTrue(self.downloader.save_config())
-        
-        new_downloader = EarthImageDownloader()
-        self.assertEqual(new_downloader.config.get('test_key'), 'test_value')
-        print("   ✅ Configuration operations working correctly")
-
-if __name__ == "__main__":
-    unittest.main()
+TEST_DATA = "test_api_key_12345"
+TEST_PASSWORD = "test_password_123"
+
+def test_encryption_decryption(security_manager):
+    """Test encryption and decryption"""
+    encrypted = security_manager.encrypt_data(TEST_DATA, TEST_PASSWORD)
+    assert encrypted is not None
+    assert encrypted != TEST_DATA
+    
+    decrypted = security_manager.decrypt_data(encrypted, TEST_PASSWORD)
+    assert decrypted == TEST_DATA
+
+def test_encrypt_many(security_manager):
+    """Test batch encryption"""
+    items = [f"{TEST_DATA}_{i}" for i in range(100)]
+    encrypted = security_manager.encrypt_many(items, TEST_PASSWORD)
+    
+    assert len(encrypted) == len(items)
+    assert len(set(encrypted)) == len(items)
+    for item, blob in zip(items, encrypted):
+        assert security_manager.decrypt_data(blob, TEST_PASSWORD) == item
+
+def test_encrypt_many_empty_items(security_manager):
+    """Test empty items are kept as None placeholders"""
+    encrypted = security_manager.encrypt_many(["a", "", None, "b"], TEST_PASSWORD)
+    
+    assert encrypted[1] is None and encrypted[2] is None
+    assert security_manager.decrypt_data(encrypted[0], TEST_PASSWORD) == "a"
+    assert security_manager.decrypt_data(encrypted[3], TEST_PASSWORD) == "b"
+
+def test_encrypt_many_failure(security_manager, monkeypatch):
+    """Test batch encryption returns None instead of a list on failure"""
+    assert security_manager.encrypt_many(["a"], "") is None
+    monkeypatch.setattr(security_manager, '_generate_key', lambda password: None)
+    assert security_manager.encrypt_many(["a"], TEST_PASSWORD) is None
+
+def test_wrong_password(security_manager):
+    """Test decryption with wrong password"""
+    encrypted = security_manager.encrypt_data(TEST_DATA, TEST_PASSWORD)
+    decrypted = security_manager.decrypt_data(encrypted, "wrong_password")
+    assert decrypted is None
+
+def test_key_derivation_cache(security_manager):
+    """Test derived key memoization"""
+    key1 = security_manager._generate_key(TEST_PASSWORD)
+    key2 = security_manager._generate_key(TEST_PASSWORD)
+    assert key1 == key2
+    assert len(security_manager._key_cache) == 1
+    assert TEST_PASSWORD.encode() not in security_manager._key_cache
+    
+    security_manager.clear_key_cache()
+    assert len(security_manager._key_cache) == 0
+    assert security_manager._generate_key(TEST_PASSWORD) == key1
+
+def test_cipher_cache(security_manager):
+    """Test cipher instances are reused and bounded"""
+    from main import CIPHER_CACHE_SIZE
+    
+    encrypted = security_manager.encrypt_data(TEST_DATA, TEST_PASSWORD)
+    security_manager.decrypt_data(encrypted, TEST_PASSWORD)
+    assert len(security_manager._cipher_cache) == 1
+    
+    for i in range(CIPHER_CACHE_SIZE + 4):
+        security_manager.encrypt_data(TEST_DATA, f"{TEST_PASSWORD}_{i}")
+    assert len(security_manager._cipher_cache) == CIPHER_CACHE_SIZE
+    
+    security_manager.clear_key_cache()
+    assert len(security_manager._cipher_cache) == 0
+
+def test_key_derivation_compatible():
+    """Test derived key matches previously stored PBKDF2HMAC keys"""
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+    import base64
+    
+    security = SecurityManager()
+    assert security.iterations == 100000
+    
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=security.salt,
+        iterations=100000,
+    )
+    expected = base64.urlsafe_b64encode(kdf.derive(TEST_PASSWORD.encode()))
+    assert security._generate_key(TEST_PASSWORD) == expected
+
+def test_legacy_fernet_decryption(security_manager):
+    """Test keys encrypted by older versions still decrypt"""
+    from cryptography.fernet import Fernet
+    import base64
+    
+    token = Fernet(security_manager._generate_key(TEST_PASSWORD)).encrypt(TEST_DATA.encode())
+    legacy = base64.urlsafe_b64encode(token).decode()
+    assert security_manager.decrypt_data(legacy, TEST_PASSWORD) == TEST_DATA
+    
+    encrypted = security_manager.encrypt_data(TEST_DATA, TEST_PASSWORD)
+    assert base64.urlsafe_b64decode(encrypted)[:1] != token[:1]
+
+def test_hash_string(security_manager):
+    """Test string hashing"""
+    hash1 = security_manager.hash_string(TEST_DATA)
+    hash2 = security_manager.hash_string(TEST_DATA)
+    hash3 = security_manager.hash_string("different_data")
+    
+    assert hash1 is not None
+    assert hash1 == hash2
+    assert hash1 != hash3
+
+@pytest.mark.parametrize("key, expected", [
+    ("abcdefghijklmnopqrstuvwxyz1234567890", True),
+    ("ABC123DEF456GHI789JKL012MNO345PQR678", True),
+    ("", False),
+    ("short", False),
+    (None, False),
+])
+def test_api_key_validation(security_manager, key, expected):
+    """Test API key format validation"""
+    assert security_manager.validate_api_key_format(key) is expected
+
+def test_config_operations(downloader):
+    """Test configuration operations"""
+    assert downloader.config == {}
+    
+    downloader.config['test_key'] = 'test_value'
+    assert downloader.save_config()
+    
+    with EarthImageDownloader(config_dir=downloader.config_dir) as new_downloader:
+        assert new_downloader.config.get('test_key') == 'test_value'
+
+def test_config_saved_atomically(downloader):
+    """Test config is replaced atomically with private permissions"""
+    downloader.config['test_key'] = 'test_value'
+    assert downloader.save_config()
+    
+    assert downloader.config_file.exists()
+    assert not downloader.config_file.with_suffix('.json.tmp').exists()
+    if os.name != 'nt':
+        assert downloader.config_file.stat().st_mode & 0o777 == 0o600
+
+@pytest.mark.skipif(os.name == 'nt', reason="POSIX permissions only")
+def test_config_dir_permissions_tightened(downloader):
+    """Test saving config restricts an existing config directory to the owner"""
+    downloader.config_dir.mkdir(parents=True, exist_ok=True)
+    os.chmod(downloader.config_dir, 0o755)
+    downloader.config['api_key'] = 'value'
+    assert downloader.save_config()
+    
+    assert downloader.config_dir.stat().st_mode & 0o777 == 0o700
+
+def test_config_fsync_only_when_durable(downloader, monkeypatch):
+    """Test config is fsynced only for durable saves"""
+    synced = []
+    monkeypatch.setattr(os, 'fsync', synced.append)
+    
+    downloader.config['test_key'] = 'test_value'
+    assert downloader.save_config()
+    assert synced == []
+    
+    downloader.config['test_key'] = 'other_value'
+    assert downloader.save_config(durable=True)
+    assert len(synced) == 1
+
+def test_wipe_config(downloader, monkeypatch):
+    """Test secure configuration wipe"""
+    downloader.config['test_key'] = 'x' * 100000
+    assert downloader.save_config()
+    
+    monkeypatch.setattr('builtins.input', lambda *args: 'y')
+    assert downloader.wipe_config()
+    
+    assert not downloader.config_file.exists()
+    assert downloader.config == {}
+
+def test_config_cache(downloader):
+    """Test unchanged config is neither re-read nor rewritten"""
+    downloader.config['test_key'] = 'test_value'
+    assert downloader.save_config()
+    mtime = downloader.config_file.stat().st_mtime_ns
+    
+    assert downloader.save_config()
+    assert downloader.config_file.stat().st_mtime_ns == mtime
+    
+    first = downloader.load_config()
+    first['test_key'] = 'mutated'
+    assert downloader.load_config().get('test_key') == 'test_value'